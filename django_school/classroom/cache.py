@@ -0,0 +1,24 @@
+from django.core.cache import cache
+
+from .models import Subject
+
+TEACHER_ANALYTICS_TIMEOUT = 300
+
+SUBJECTS_KEY = 'subjects_all'
+SUBJECTS_TIMEOUT = 3600
+
+
+def teacher_analytics_key(user_pk):
+    return f'teacher_analytics:{user_pk}'
+
+
+def invalidate_teacher_analytics(user_pk):
+    cache.delete(teacher_analytics_key(user_pk))
+
+
+def get_subjects():
+    return cache.get_or_set(SUBJECTS_KEY, lambda: list(Subject.objects.all()), SUBJECTS_TIMEOUT)
+
+
+def invalidate_subjects():
+    cache.delete(SUBJECTS_KEY)
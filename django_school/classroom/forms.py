@@ -67,6 +67,34 @@ class BaseAnswerInlineFormSet(forms.BaseInlineFormSet):
         if not has_one_correct_answer:
             raise ValidationError('Mark at least one answer as correct.', code='no_correct_answer')
 
+    def save(self, commit=True):
+        # Collect new/changed/deleted answers without touching the database,
+        # then write each group with a single query.
+        instances = super().save(commit=False)
+        if commit:
+            manager = self.model._default_manager
+            if self.new_objects:
+                manager.bulk_create(self.new_objects)
+            if self.changed_objects:
+                changed_fields = {field for obj, fields in self.changed_objects for field in fields}
+                manager.bulk_update([obj for obj, fields in self.changed_objects], changed_fields)
+            if self.deleted_objects:
+                manager.filter(pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+            self.save_m2m()
+        return instances
+
+
+AnswerFormSet = forms.inlineformset_factory(
+    Question,  # parent model
+    Answer,  # base model
+    formset=BaseAnswerInlineFormSet,
+    fields=('text', 'is_correct'),
+    min_num=2,
+    validate_min=True,
+    max_num=10,
+    validate_max=True
+)
+
 
 class TakeQuizForm(forms.ModelForm):
     answer = forms.ModelChoiceField(
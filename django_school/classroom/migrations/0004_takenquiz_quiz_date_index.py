@@ -0,0 +1,17 @@
+# Generated by Django 2.2.7 on 2026-10-15 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0003_auto_20210509_1624'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='takenquiz',
+            index=models.Index(fields=['quiz', 'date'], name='classroom_t_quiz_id_acf9c9_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.7 on 2026-10-15 14:45
+
+from django.db import migrations, models
+
+
+def create_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS quiz_name_trgm ON classroom_quiz USING gin (UPPER(name) gin_trgm_ops)'
+    )
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS quiz_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0004_takenquiz_quiz_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['owner', 'name'], name='classroom_q_owner_i_705af6_idx'),
+        ),
+        migrations.RunPython(create_name_trigram_index, drop_name_trigram_index),
+    ]
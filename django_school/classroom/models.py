@@ -27,6 +27,11 @@ class Quiz(models.Model):
     name = models.CharField(max_length=255)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='quizzes')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -70,6 +75,11 @@ class TakenQuiz(models.Model):
     score = models.FloatField()
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['quiz', 'date']),
+        ]
+
 
 class StudentAnswer(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='quiz_answers')
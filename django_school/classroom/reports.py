@@ -0,0 +1,17 @@
+from fpdf import FPDF
+
+
+def build_quiz_pdf(quiz):
+    pdf = FPDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_font('Times', 'B', 16)
+    pdf.cell(0, 10, txt=quiz.name, ln=1)
+    for question_line, question in enumerate(quiz.questions.all(), 1):
+        pdf.set_font('Times', 'B', 14)
+        pdf.multi_cell(0, 10, txt=f'\n{question_line}. {question.text}')
+        pdf.set_font('Times', '', 14)
+        answers = '\n'.join(f'{answer_line}. {answer.text}'
+                            for answer_line, answer in enumerate(question.answers.all(), 1))
+        pdf.multi_cell(0, 10, txt=f'\n{answers}')
+    return pdf.output(dest='S').encode('latin-1')
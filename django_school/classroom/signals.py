@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_subjects, invalidate_teacher_analytics
+from .models import Quiz, Subject, TakenQuiz
+
+
+@receiver(post_save, sender=TakenQuiz)
+def taken_quiz_saved(sender, instance, **kwargs):
+    invalidate_teacher_analytics(instance.quiz.owner_id)
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_deleted(sender, instance, **kwargs):
+    # Taken quizzes are only removed by cascade, so clear the owner's
+    # analytics once per quiz rather than once per taken quiz.
+    invalidate_teacher_analytics(instance.owner_id)
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    invalidate_subjects()
@@ -8,9 +8,10 @@ from django.urls import reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, ListView, UpdateView
 
+from ..cache import get_subjects
 from ..decorators import student_required
 from ..forms import StudentInterestsForm, StudentSignUpForm, TakeQuizForm
-from ..models import Quiz, Student, TakenQuiz, User, Subject
+from ..models import Quiz, Student, TakenQuiz, User
 
 
 class StudentSignUpView(CreateView):
@@ -53,8 +54,8 @@ class QuizListView(ListView):
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get a context
         context = super().get_context_data(**kwargs)
-        # Add in a QuerySet of all the books
-        context['subjects_list'] = Subject.objects.all()
+        # Subjects for the filter dropdown, served from the cache
+        context['subjects_list'] = get_subjects()
         return context
 
     def get_queryset(self):
@@ -1,21 +1,26 @@
+from io import BytesIO
+
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.db.models import Avg, Count, DateField, F, Q
-from django.db.models.functions import TruncDate, Cast
-from django.forms import inlineformset_factory
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import (Avg, CharField, Count, DateField, F, Func, IntegerField, OuterRef, Q, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce, TruncDate, Cast
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
 from django.utils.decorators import method_decorator
+from django.utils.text import slugify
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
-from fpdf import FPDF
 
+from ..cache import TEACHER_ANALYTICS_TIMEOUT, get_subjects, teacher_analytics_key
 from ..decorators import teacher_required
-from ..forms import BaseAnswerInlineFormSet, QuestionForm, TeacherSignUpForm
-from ..models import Answer, Question, Quiz, User, TakenQuiz, Subject, Student
+from ..forms import AnswerFormSet, QuestionForm, TeacherSignUpForm
+from ..models import Question, Quiz, User, TakenQuiz, Student, StudentAnswer
+from ..reports import build_quiz_pdf
 
 
 class TeacherSignUpView(CreateView):
@@ -36,25 +41,44 @@ class TeacherSignUpView(CreateView):
 @method_decorator([login_required, teacher_required], name='dispatch')
 class QuizListView(ListView):
     model = Quiz
-    ordering = ('name', )
+    ordering = ('name', 'id')
+    paginate_by = 25
     context_object_name = 'quizzes'
     template_name = 'classroom/teachers/quiz_change_list.html'
 
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get a context
         context = super().get_context_data(**kwargs)
-        # Add in a QuerySet of all the books
-        context['subjects_list'] = Subject.objects.all()
+        # Subjects for the filter dropdown, served from the cache
+        context['subjects_list'] = get_subjects()
+        # Keep the search/filter/ordering params in the pagination links
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['query_params'] = params.urlencode()
         return context
 
     def get_queryset(self):
         find_query = self.request.GET.get('q')
         type_query = self.request.GET.get('type')
         ordering_query = self.request.GET.get('ordering')
+        questions_count = Question.objects \
+            .filter(quiz=OuterRef('pk')) \
+            .order_by() \
+            .values('quiz') \
+            .annotate(count=Count('pk')) \
+            .values('count')
+        taken_count = TakenQuiz.objects \
+            .filter(quiz=OuterRef('pk')) \
+            .order_by() \
+            .values('quiz') \
+            .annotate(count=Count('pk')) \
+            .values('count')
         queryset = self.request.user.quizzes \
             .select_related('subject') \
-            .annotate(questions_count=Count('questions', distinct=True)) \
-            .annotate(taken_count=Count('taken_quizzes', distinct=True))
+            .only('owner', 'name', 'subject__name', 'subject__color') \
+            .annotate(questions_count=Coalesce(Subquery(questions_count, output_field=IntegerField()), 0)) \
+            .annotate(taken_count=Coalesce(Subquery(taken_count, output_field=IntegerField()), 0)) \
+            .order_by(*self.get_ordering())
         #breakpoint()
         if find_query is not None:
             queryset = queryset.filter(name__icontains=find_query)
@@ -64,7 +88,7 @@ class QuizListView(ListView):
 
         if ordering_query is not None:
             if ordering_query == 'name' or ordering_query == '-name':
-                queryset = queryset.order_by(ordering_query)
+                queryset = queryset.order_by(ordering_query, 'id')
         return queryset
 
 
@@ -90,7 +114,7 @@ class QuizUpdateView(UpdateView):
     template_name = 'classroom/teachers/quiz_change_form.html'
 
     def get_context_data(self, **kwargs):
-        kwargs['questions'] = self.get_object().questions.annotate(answers_count=Count('answers'))
+        kwargs['questions'] = self.object.questions.annotate(answers_count=Count('answers'))
         return super().get_context_data(**kwargs)
 
     def get_queryset(self):
@@ -108,9 +132,9 @@ class QuizDeleteView(DeleteView):
     success_url = reverse_lazy('teachers:quiz_change_list')
 
     def delete(self, request, *args, **kwargs):
-        quiz = self.get_object()
-        messages.success(request, 'The quiz %s was deleted with success!' % quiz.name)
-        return super().delete(request, *args, **kwargs)
+        response = super().delete(request, *args, **kwargs)
+        messages.success(request, 'The quiz %s was deleted with success!' % self.object.name)
+        return response
 
     def get_queryset(self):
         return self.request.user.quizzes.all()
@@ -123,13 +147,15 @@ class QuizResultsView(DetailView):
     template_name = 'classroom/teachers/quiz_results.html'
 
     def get_context_data(self, **kwargs):
-        quiz = self.get_object()
-        taken_quizzes = quiz.taken_quizzes.select_related('student__user').order_by('-date')
-        total_taken_quizzes = taken_quizzes.count()
-        quiz_score = quiz.taken_quizzes.aggregate(average_score=Avg('score'))
+        quiz = self.object
+        taken_quizzes = quiz.taken_quizzes \
+            .select_related('student__user') \
+            .only('quiz', 'score', 'date', 'student__user__username') \
+            .order_by('-date')
+        quiz_score = quiz.taken_quizzes.aggregate(total=Count('id'), average_score=Avg('score'))
         extra_context = {
             'taken_quizzes': taken_quizzes,
-            'total_taken_quizzes': total_taken_quizzes,
+            'total_taken_quizzes': quiz_score['total'],
             'quiz_score': quiz_score
         }
         kwargs.update(extra_context)
@@ -161,30 +187,22 @@ def question_add(request, pk):
 @login_required
 @teacher_required
 def question_change(request, quiz_pk, question_pk):
-    quiz = get_object_or_404(Quiz, pk=quiz_pk, owner=request.user)
-    question = get_object_or_404(Question, pk=question_pk, quiz=quiz)
-
-    AnswerFormSet = inlineformset_factory(
-        Question,  # parent model
-        Answer,  # base model
-        formset=BaseAnswerInlineFormSet,
-        fields=('text', 'is_correct'),
-        min_num=2,
-        validate_min=True,
-        max_num=10,
-        validate_max=True
-    )
-
     if request.method == 'POST':
-        form = QuestionForm(request.POST, instance=question)
-        formset = AnswerFormSet(request.POST, instance=question)
-        if form.is_valid() and formset.is_valid():
-            with transaction.atomic():
+        with transaction.atomic():
+            # Lock the quiz before reading the question and its answers, so concurrent
+            # edits validate against the state left by the previous save; GETs stay unlocked.
+            quiz = get_object_or_404(Quiz.objects.select_for_update(), pk=quiz_pk, owner=request.user)
+            question = get_object_or_404(Question, pk=question_pk, quiz=quiz)
+            form = QuestionForm(request.POST, instance=question)
+            formset = AnswerFormSet(request.POST, instance=question)
+            if form.is_valid() and formset.is_valid():
                 form.save()
                 formset.save()
-            messages.success(request, 'Question and answers saved with success!')
-            return redirect('teachers:quiz_change', quiz.pk)
+                messages.success(request, 'Question and answers saved with success!')
+                return redirect('teachers:quiz_change', quiz.pk)
     else:
+        quiz = get_object_or_404(Quiz, pk=quiz_pk, owner=request.user)
+        question = get_object_or_404(Question, pk=question_pk, quiz=quiz)
         form = QuestionForm(instance=question)
         formset = AnswerFormSet(instance=question)
 
@@ -199,21 +217,17 @@ def question_change(request, quiz_pk, question_pk):
 @login_required
 @teacher_required
 def view_students_answers(request, quiz_pk, student_pk):
-    quiz = get_object_or_404(Quiz, pk=quiz_pk, owner=request.user)
+    quiz = get_object_or_404(Quiz.objects.prefetch_related('questions__answers'), pk=quiz_pk, owner=request.user)
     student = get_object_or_404(Student, pk=student_pk)
-    questions = Quiz.objects.prefetch_related('questions').get(pk=quiz_pk, owner=request.user).questions.all()
-    answers = {question.text: question.answers.all() for question in questions}
-    all_answers = [question.answers.all() for question in questions]
-    students_answers = []
-    for question_answer in all_answers:
-        for answer in question_answer:
-            if answer.student_answer.filter(student=student).exists():
-                students_answers.append(answer)
+    answers = {question.text: question.answers.all() for question in quiz.questions.all()}
+    student_answer_ids = set(StudentAnswer.objects
+                             .filter(student=student, answer__question__quiz=quiz)
+                             .values_list('answer_id', flat=True))
 
     return render(request, 'classroom/teachers/user_quiz_answers.html', {
         'quiz': quiz,
         'answers': answers,
-        'students_answers': students_answers,
+        'student_answer_ids': student_answer_ids,
         'student': student,
     })
 
@@ -221,29 +235,10 @@ def view_students_answers(request, quiz_pk, student_pk):
 @login_required
 @teacher_required
 def get_quiz_in_pdf(request, quiz_pk):
-    quiz = get_object_or_404(Quiz, pk=quiz_pk, owner=request.user)
-    pdf = FPDF()
-    pdf.alias_nb_pages()
-    pdf.add_page()
-    pdf.set_font('Times', 'B', 16)
-    pdf.cell(0, 10, txt=quiz.name, ln=1)
-    pdf.set_font('Times', '', 14)
-    questions = Quiz.objects.prefetch_related('questions').get(pk=quiz_pk, owner=request.user).questions.all()
-    question_lines = 1
-    for question in questions:
-        pdf.cell(0, 10, txt='', ln=1)
-        pdf.set_font('Times', 'B', 14)
-        pdf.cell(0, 10, txt=f'{question_lines}. {question.text}', ln=1)
-        pdf.set_font('Times', '', 14)
-        pdf.cell(0, 10, txt='', ln=1)
-        question_lines += 1
-        answer_lines = 1
-        for answer in question.answers.all():
-            pdf.cell(0, 10, txt=f'{answer_lines}. {answer.text}', ln=1)
-            answer_lines += 1
-    pdf.output(f'{quiz.name}.pdf')
-    response = FileResponse(open(f'{quiz.name}.pdf', 'rb'), as_attachment=True)
-    return response
+    quiz = get_object_or_404(Quiz.objects.prefetch_related('questions__answers'), pk=quiz_pk, owner=request.user)
+    buffer = BytesIO(build_quiz_pdf(quiz))
+    filename = f'{slugify(quiz.name) or "quiz"}.pdf'
+    return FileResponse(buffer, as_attachment=True, filename=filename, content_type='application/pdf')
 
 
 @method_decorator([login_required, teacher_required], name='dispatch')
@@ -254,36 +249,50 @@ class QuestionDeleteView(DeleteView):
     pk_url_kwarg = 'question_pk'
 
     def get_context_data(self, **kwargs):
-        question = self.get_object()
-        kwargs['quiz'] = question.quiz
+        kwargs['quiz'] = self.object.quiz
         return super().get_context_data(**kwargs)
 
     def delete(self, request, *args, **kwargs):
-        question = self.get_object()
-        messages.success(request, 'The question %s was deleted with success!' % question.text)
-        return super().delete(request, *args, **kwargs)
+        response = super().delete(request, *args, **kwargs)
+        messages.success(request, 'The question %s was deleted with success!' % self.object.text)
+        return response
 
     def get_queryset(self):
-        return Question.objects.filter(quiz__owner=self.request.user)
+        return Question.objects.select_related('quiz').filter(quiz__owner=self.request.user)
 
     def get_success_url(self):
-        question = self.get_object()
-        return reverse('teachers:quiz_change', kwargs={'pk': question.quiz_id})
+        return reverse('teachers:quiz_change', kwargs={'pk': self.object.quiz_id})
+
+
+def count_taken_quizzes_by_date(user):
+    labels = []
+    data = []
+    queryset = TakenQuiz.objects \
+        .filter(quiz__owner=user) \
+        .annotate(date_only=TruncDate('date')) \
+        .values('date_only') \
+        .annotate(count=Count('id')) \
+        .order_by('date_only')
+    if connections[queryset.db].vendor == 'postgresql':
+        # Let the database format the labels instead of building a date per row
+        rows = queryset \
+            .annotate(label=Func(F('date_only'), Value('MM/DD/YYYY'), function='TO_CHAR', output_field=CharField())) \
+            .values_list('label', 'count') \
+            .iterator(chunk_size=500)
+    else:
+        rows = ((entry['date_only'].strftime("%m/%d/%Y"), entry['count'])
+                for entry in queryset.iterator(chunk_size=500))
+    for label, count in rows:
+        labels.append(label)
+        data.append(count)
+    return {'labels': labels, 'data': data}
 
 
 @login_required
 @teacher_required
 def get_analytics_by_count_taken_quizzes(request):
-    labels = []
-    data = []
     user = request.user
-    queryset = TakenQuiz.objects.select_related('quiz')\
-        .filter(quiz__owner=user) \
-        .order_by()\
-        .annotate(date_only=TruncDate('date')).values('date_only').annotate(count=Count('id'))
-    #breakpoint()
-    for entry in queryset:
-        labels.append(entry['date_only'].strftime("%m/%d/%Y"))
-        data.append(entry['count'])
-    return render(request, 'classroom/teachers/analytics.html',
-                  {'labels': labels, 'data': data})
\ No newline at end of file
+    analytics = cache.get_or_set(teacher_analytics_key(user.pk),
+                                 lambda: count_taken_quizzes_by_date(user),
+                                 TEACHER_ANALYTICS_TIMEOUT)
+    return render(request, 'classroom/teachers/analytics.html', analytics)